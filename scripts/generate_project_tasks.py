@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Seed Project Task data in milestoneDevOrg via Salesforce CLI.
+Seed Project Task data in milestoneDevOrg via the Salesforce REST API.
 
 What it does:
 - Queries Accounts and their Projects.
@@ -11,6 +11,10 @@ What it does:
   Hank (only on William's Account).
 - Adds subtasks and a handful of Project_Task_Relationship__c records to create
   variety (parent/child and dependency/related links).
+- Creates missing projects through the sObject Collections API, then each
+  Account's tasks, subtasks and relationships as a single Composite Graph
+  request instead of one call per record (Accounts past the 500-record graph
+  limit are split into several graphs, each task kept with its subtasks).
 
 Usage:
   python scripts/generate_project_tasks.py \
@@ -18,24 +22,42 @@ Usage:
 
 Flags:
   --org           Target org alias/username. Default: milestoneDevOrg
-  --min/--max     Task count range per Account. Default: 10-20
+  --min/--max     Task count range per Account (min >= 8, one per status). Default: 10-20
   --dry-run       Only print what would happen.
   --owner-kevin   Name fragment for Kevin (default: "Kevin P")
   --owner-william Name fragment for William (default: "William Hank")
+  --workers       Accounts processed concurrently. Default: 8
+  --parallel      Shard Accounts across worker processes instead of threads
+                  (for very large orgs where JSON handling becomes CPU-bound).
 
 Requirements:
-- Salesforce CLI (`sf`) authenticated to the org.
+- Salesforce CLI (`sf`) authenticated to the org (used to read its access token,
+  which is cached in ~/.cache/sf_pyseed/ for 30 minutes).
 - Project__c records exist and are related to Accounts (master-detail requirement).
 """
 
 import argparse
 import datetime as dt
+import functools
+import itertools
 import json
 import random
-import subprocess
 import sys
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 
+from sf_api import (
+    BatchWriter,
+    CompositeGraph,
+    SalesforceSession,
+    composite_query,
+    describe_fields,
+    escape_soql,
+    soql_iter,
+)
+
 STATUSES = [
     "Backlog",
     "Pending",
@@ -50,119 +72,96 @@ STATUSES = [
 PRIORITIES = ["High", "Medium", "Low"]
 REL_TYPES = ["Related", "Blocking Dependency", "Epic/Feature Parent"]
 
+Owner = Dict[str, Optional[str]]
+OwnerPool = Tuple[List[Owner], List[float]]
+# Only the Id (for subtasks/relationships) and status (for parent selection) are needed downstream.
+Task = namedtuple("Task", ["id", "status"])
 
-def run_sf(args: List[str], expect_json: bool = True) -> dict:
-    """Run an sf CLI command and return parsed JSON."""
-    cmd = ["sf"] + args
-    result = subprocess.run(
-        cmd, check=False, capture_output=True, text=True
-    )
-    if result.returncode != 0:
-        raise RuntimeError(
-            f"sf command failed: {' '.join(cmd)}\nSTDERR: {result.stderr.strip()}\nSTDOUT: {result.stdout.strip()}"
-        )
-    if not expect_json:
-        return {}
-    try:
-        return json.loads(result.stdout)
-    except json.JSONDecodeError as exc:
-        raise RuntimeError(f"Could not parse sf JSON output: {result.stdout}") from exc
-
-
-def soql(org: str, query: str) -> List[dict]:
-    resp = run_sf(
-        ["data", "query", "--target-org", org, "-q", query, "--json"]
-    )
-    return resp.get("result", {}).get("records", [])
-
-
-def current_user(org: str) -> dict:
-    resp = run_sf(["org", "display", "--target-org", org, "--json"])
-    return resp.get("result", {})
+# Guards the shared William budget when accounts are processed concurrently.
+WILLIAM_LOCK = threading.Lock()
 
 
-def resolve_current_user_id(org: str) -> str:
+def resolve_current_user_id(session: SalesforceSession) -> str:
     """Return the current authenticated user's Id."""
-    me = current_user(org)
-    user_id = me.get("userId")
-    if user_id:
-        return user_id
-    username = me.get("username")
+    username = session.username
     if not username:
         raise RuntimeError("Could not determine current user username.")
-    records = soql(
-        org,
-        f"SELECT Id FROM User WHERE Username = '{username}' LIMIT 1",
+    record = next(
+        soql_iter(session, f"SELECT Id FROM User WHERE Username = '{escape_soql(username)}' LIMIT 1"),
+        None,
     )
-    if not records:
+    if not record:
         raise RuntimeError(f"Could not resolve user id for {username}")
-    return records[0]["Id"]
+    return record["Id"]
 
 
-def find_user(org: str, name_fragment: str) -> Optional[dict]:
+@functools.lru_cache(maxsize=None)
+def find_users_bulk(session: SalesforceSession, fragments: Tuple[str, ...]) -> Dict[str, Optional[dict]]:
+    """
+    Look up several users by name fragment with a single query.
+
+    Returns the most recently modified match per fragment (None when nothing matches).
+    """
+    where = " OR ".join(f"Name LIKE '%{escape_soql(f, like=True)}%'" for f in fragments)
     query = (
         "SELECT Id, Name, Username, ContactId, Contact.AccountId "
-        f"FROM User WHERE Name LIKE '%{name_fragment}%' "
-        "ORDER BY LastModifiedDate DESC LIMIT 1"
-    )
-    records = soql(org, query)
-    return records[0] if records else None
-
-
-def create_record(org: str, sobject: str, values: Dict[str, str]) -> str:
-    value_str = " ".join([f"{k}='{v}'" for k, v in values.items()])
-    resp = run_sf(
-        [
-            "data",
-            "create",
-            "record",
-            "--target-org",
-            org,
-            "--sobject",
-            sobject,
-            "--values",
-            value_str,
-            "--json",
-        ]
+        f"FROM User WHERE {where} "
+        "ORDER BY LastModifiedDate DESC"
     )
-    return resp.get("result", {}).get("id")
+    records = list(soql_iter(session, query))
+    matches: Dict[str, Optional[dict]] = {}
+    for fragment in fragments:
+        needle = fragment.lower()
+        matches[fragment] = next(
+            (r for r in records if needle in (r.get("Name") or "").lower()), None
+        )
+    return matches
 
 
-def has_field(org: str, sobject: str, field: str) -> bool:
-    """Lightweight field existence check via a safe query."""
+def has_field(session: SalesforceSession, sobject: str, field: str) -> bool:
+    """Field existence check against the (cached) sObject describe."""
     try:
-        soql(org, f"SELECT Id, {field} FROM {sobject} LIMIT 1")
-        return True
-    except Exception:
+        return field in describe_fields(session, sobject)
+    except RuntimeError:
         return False
 
 
-def date_offset(days: int) -> str:
-    return (dt.date.today() + dt.timedelta(days=days)).isoformat()
+def date_offset(today: dt.date, days: int) -> str:
+    return (today + dt.timedelta(days=days)).isoformat()
+
+
+def build_owner_pool(weighted_owners: List[Tuple[float, Optional[Owner]]]) -> OwnerPool:
+    """Return (candidates, cumulative weights) for random.choices, skipping missing owners."""
+    present = [(weight, owner) for weight, owner in weighted_owners if owner]
+    return [owner for _, owner in present], list(itertools.accumulate(weight for weight, _ in present))
 
 
-def pick_owner(
+def pick_owners(
     account_id: str,
-    me: Dict[str, Optional[str]],
-    kevin: Optional[Dict[str, Optional[str]]],
-    william: Optional[Dict[str, Optional[str]]],
+    owner_pools: Tuple[OwnerPool, OwnerPool],
+    william: Optional[Owner],
     max_william: Dict[str, int],
-) -> Dict[str, Optional[str]]:
-    """Return chosen owner info: user_id, contact_id, account_id."""
-    candidates = []
-    candidates.append({"weight": 0.55, **me})
-    if kevin:
-        candidates.append({"weight": 0.35, **kevin})
-    if william and william.get("account_id") == account_id and max_william["remaining"] > 0:
-        candidates.append({"weight": 0.10, **william})
-
-    weights = [c["weight"] for c in candidates]
-    total = sum(weights)
-    weights = [w / total for w in weights]
-    choice = random.choices(candidates, weights=weights, k=1)[0]
-    if choice.get("user_id") == (william or {}).get("user_id"):
-        max_william["remaining"] -= 1
-    return choice
+    count: int,
+) -> List[Owner]:
+    """Return `count` owners (user_id, contact_id, account_id) drawn in one call."""
+    default_pool, william_pool = owner_pools
+    eligible = william and william.get("account_id") == account_id and max_william["remaining"] > 0
+    candidates, cum_weights = william_pool if eligible else default_pool
+    owners = random.choices(candidates, cum_weights=cum_weights, k=count)
+    if not eligible:
+        return owners
+
+    # Keep William within budget; picks past it are redrawn from the default pool.
+    william_picks = [i for i, owner in enumerate(owners) if owner.get("user_id") == william.get("user_id")]
+    with WILLIAM_LOCK:
+        granted = min(len(william_picks), max_william["remaining"])
+        max_william["remaining"] -= granted
+    excess = william_picks[granted:]
+    if excess:
+        candidates, cum_weights = default_pool
+        for i, owner in zip(excess, random.choices(candidates, cum_weights=cum_weights, k=len(excess))):
+            owners[i] = owner
+    return owners
 
 
 def generate_task_payload(
@@ -171,8 +170,8 @@ def generate_task_payload(
     status: str,
     developer_id: str,
     name_suffix: str,
+    today: dt.date,
 ) -> Dict[str, str]:
-    today = dt.date.today()
     due = today + dt.timedelta(days=random.randint(3, 45))
     start = today + dt.timedelta(days=random.randint(-3, 10))
     payload = {
@@ -190,6 +189,120 @@ def generate_task_payload(
     return payload
 
 
+def process_account(
+    acct: dict,
+    session: SalesforceSession,
+    args: argparse.Namespace,
+    projects_by_account: Dict[str, List[dict]],
+    owner_pools: Tuple[OwnerPool, OwnerPool],
+    william: Optional[Owner],
+    max_william: Dict[str, int],
+    rel_field_available: bool,
+    today: dt.date,
+) -> Dict[str, int]:
+    """Seed tasks, subtasks and relationships for one Account; return its counts."""
+    summary = {"tasks": 0, "subtasks": 0, "relationships": 0}
+    acct_projects = projects_by_account.get(acct["Id"], [])
+    if not acct_projects:
+        print(f"Warning: Account '{acct['Name']}' still has no projects after creation attempt. Skipping.")
+        return summary
+    project_id = random.choice(acct_projects)["Id"]
+
+    total_tasks = random.randint(args.min_tasks, args.max_tasks)
+    # Every status once, in random order, then random fill
+    extra = max(0, total_tasks - len(STATUSES))
+    tasks_to_create = random.sample(STATUSES, k=len(STATUSES)) + random.choices(STATUSES, k=extra)
+
+    owners = pick_owners(acct["Id"], owner_pools, william, max_william, len(tasks_to_create))
+    payloads = [
+        generate_task_payload(acct, project_id, status, owner.get("contact_id"), f"#{idx}", today)
+        for idx, (status, owner) in enumerate(zip(tasks_to_create, owners), start=1)
+    ]
+
+    # Subtasks (20% of tasks become parents, 1-3 subtasks each) for non-closed parents
+    open_parents = [
+        idx for idx, status in enumerate(tasks_to_create, start=1) if status not in ("Closed", "Completed", "Removed")
+    ]
+    if open_parents:
+        potential_parents = random.sample(open_parents, max(1, len(open_parents) // 5))
+    else:
+        potential_parents = []
+    subtask_slots = [(parent_idx, n) for parent_idx in potential_parents for n in range(random.randint(1, 3))]
+    owners = pick_owners(acct["Id"], owner_pools, william, max_william, len(subtask_slots))
+    subtasks_by_parent: Dict[int, List[dict]] = {}
+    for (parent_idx, n), owner in zip(subtask_slots, owners):
+        subtasks_by_parent.setdefault(parent_idx, []).append(
+            generate_task_payload(
+                acct,
+                project_id,
+                random.choice(STATUSES),
+                owner.get("contact_id"),
+                f"#{parent_idx}-sub{n+1}",
+                today,
+            )
+        )
+
+    # Each task goes into a Composite Graph together with its subtasks, which point
+    # at it through an @{refN.id} reference; large Accounts spill into more graphs.
+    graph = CompositeGraph(session)
+    created_tasks: List[Task] = []
+    for idx, (payload, status) in enumerate(zip(payloads, tasks_to_create), start=1):
+        subtasks = subtasks_by_parent.get(idx, [])
+        if args.dry_run:
+            print(f"[dry-run] Would create task: {payload}")
+            task_id = f"DRY{idx:04d}"
+        else:
+            graph.start_group(1 + len(subtasks))
+            task_id = graph.add("Project_Task__c", payload)
+        created_tasks.append(Task(task_id, status))
+        for subtask in subtasks:
+            subtask["Parent_Task__c"] = task_id
+            if args.dry_run:
+                print(f"[dry-run] Would create subtask: {subtask}")
+                sub_id = f"DRYS{len(created_tasks)}"
+            else:
+                sub_id = graph.add("Project_Task__c", subtask)
+            created_tasks.append(Task(sub_id, subtask["Status__c"]))
+
+    # Relationships (3 random pairs per account)
+    relationships: List[Dict[str, str]] = []
+    if len(created_tasks) > 1 and rel_field_available and not args.skip_relationships:
+        for _ in range(3):
+            a, b = random.sample(created_tasks, 2)
+            rel_type = random.choice(REL_TYPES)
+            if args.dry_run:
+                print(f"[dry-run] Would relate {a.id} -> {b.id} ({rel_type})")
+            else:
+                relationships.append({"Task_A__c": a.id, "Task_B__c": b.id, "Relationship_Type__c": rel_type})
+
+    if not args.dry_run:
+        if graph.fits(len(relationships)):
+            rel_graph, ids = graph, {}
+        else:
+            # A relationship may span two graphs, so it waits until both tasks have real Ids
+            rel_graph, ids = CompositeGraph(session), graph.submit()
+        for values in relationships:
+            rel_graph.add(
+                "Project_Task_Relationship__c", {key: ids.get(value, value) for key, value in values.items()}
+            )
+        graph.submit()
+        rel_graph.submit()
+        summary["tasks"] = len(created_tasks)
+        summary["subtasks"] = len(subtask_slots)
+        summary["relationships"] = len(relationships)
+
+    return summary
+
+
+def process_account_chunk(accounts: List[dict], **kwargs) -> Dict[str, int]:
+    """Run process_account over a shard of Accounts (in a worker process); return combined counts."""
+    summary = {"tasks": 0, "subtasks": 0, "relationships": 0}
+    for acct in accounts:
+        for key, count in process_account(acct, **kwargs).items():
+            summary[key] += count
+    return summary
+
+
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--org", default="milestoneDevOrg")
@@ -199,16 +312,24 @@ def main() -> None:
     parser.add_argument("--owner-kevin", default="Kevin P")
     parser.add_argument("--owner-william", default="William Hank")
     parser.add_argument("--skip-relationships", action="store_true")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--parallel", action="store_true")
     args = parser.parse_args()
 
-    if args.min_tasks < 1 or args.max_tasks < args.min_tasks:
-        sys.exit("Invalid min/max values.")
+    if args.min_tasks < len(STATUSES) or args.max_tasks < args.min_tasks:
+        sys.exit(f"Invalid min/max values (--min must be at least {len(STATUSES)}, one task per status).")
+    if args.workers < 1:
+        sys.exit("Invalid --workers value.")
 
     org = args.org
-    me_id = resolve_current_user_id(org)
+    today = dt.date.today()
+    today_str = today.strftime("%Y%m%d")
+    session = SalesforceSession.from_org(org)
+    me_id = resolve_current_user_id(session)
     me_info = {"user_id": me_id, "contact_id": None, "account_id": None}
 
-    kevin = find_user(org, args.owner_kevin)
+    users = find_users_bulk(session, (args.owner_kevin, args.owner_william))
+    kevin = users[args.owner_kevin]
     kevin_contact = kevin.get("Contact") if kevin else None
     kevin_account_id = kevin_contact.get("AccountId") if isinstance(kevin_contact, dict) else None
     kevin_info = (
@@ -216,7 +337,7 @@ def main() -> None:
         if kevin
         else None
     )
-    william = find_user(org, args.owner_william)
+    william = users[args.owner_william]
     william_contact = william.get("Contact") if william else None
     william_account_id = william_contact.get("AccountId") if isinstance(william_contact, dict) else None
     william_info = (
@@ -229,11 +350,22 @@ def main() -> None:
         else None
     )
     max_william = {"remaining": 4}  # keep William assignments small
+    # William is only eligible on his own Account, and only while budget remains.
+    owner_pools = (
+        build_owner_pool([(0.55, me_info), (0.35, kevin_info)]),
+        build_owner_pool([(0.55, me_info), (0.35, kevin_info), (0.10, william_info)]),
+    )
 
-    accounts = soql(org, "SELECT Id, Name FROM Account")
-    projects = soql(org, "SELECT Id, Name, Account__c FROM Project__c")
+    existing = composite_query(
+        session,
+        {
+            "accounts": "SELECT Id, Name FROM Account",
+            "projects": "SELECT Id, Name, Account__c FROM Project__c",
+        },
+    )
+    accounts = existing["accounts"]["records"]
     projects_by_account = {}
-    for proj in projects:
+    for proj in existing["projects"]["records"]:
         acct = proj.get("Account__c")
         if acct:
             projects_by_account.setdefault(acct, []).append(proj)
@@ -241,11 +373,12 @@ def main() -> None:
     # Create projects for accounts that don't have any
     # Note: Using API values from metadata (R&amp;D and Q&amp;A are stored as R&D and Q&A)
     PROJECT_STATUSES = ["Not Started", "R&D", "Proposal", "Development", "Q&A", "Deployed", "Cancelled"]
-    projects_created = 0
+    writer = BatchWriter(session)
+    new_projects = []
     for acct in accounts:
         if acct["Id"] not in projects_by_account:
             # Create a project for this account
-            project_name = f"{acct['Name']} Project - {dt.date.today().strftime('%Y%m%d')}"
+            project_name = f"{acct['Name']} Project - {today_str}"
             project_values = {
                 "Name": project_name,
                 "Account__c": acct["Id"],
@@ -256,84 +389,45 @@ def main() -> None:
                 fake_project_id = f"DRYPROJ{acct['Id'][-6:]}"
                 projects_by_account[acct["Id"]] = [{"Id": fake_project_id, "Name": project_name, "Account__c": acct["Id"]}]
             else:
-                project_id = create_record(org, "Project__c", project_values)
-                projects_by_account[acct["Id"]] = [{"Id": project_id, "Name": project_name, "Account__c": acct["Id"]}]
-                projects_created += 1
-                print(f"Created project '{project_name}' for account '{acct['Name']}'")
+                new_projects.append((acct, project_name, writer.add("Project__c", project_values)))
+    projects_created = writer.flush("Project__c")
+    for acct, project_name, project_id in new_projects:
+        projects_by_account[acct["Id"]] = [{"Id": project_id.value, "Name": project_name, "Account__c": acct["Id"]}]
+        print(f"Created project '{project_name}' for account '{acct['Name']}'")
 
-    rel_field_available = has_field(org, "Project_Task_Relationship__c", "Relationship_Type__c")
+    rel_field_available = has_field(session, "Project_Task_Relationship__c", "Relationship_Type__c")
     if not rel_field_available:
         print("Note: Project_Task_Relationship__c.Relationship_Type__c not available. Skipping relationship creation.")
     if args.skip_relationships:
         print("Note: Relationship creation skipped via --skip-relationships.")
 
     summary = {"projects": projects_created, "tasks": 0, "subtasks": 0, "relationships": 0}
-    for acct in accounts:
-        acct_projects = projects_by_account.get(acct["Id"], [])
-        if not acct_projects:
-            print(f"Warning: Account '{acct['Name']}' still has no projects after creation attempt. Skipping.")
-            continue
-        project_id = random.choice(acct_projects)["Id"]
-
-        total_tasks = random.randint(args.min_tasks, args.max_tasks)
-        statuses = STATUSES.copy()
-        random.shuffle(statuses)
-        tasks_to_create = statuses + [
-            random.choice(STATUSES) for _ in range(total_tasks - len(STATUSES))
-        ]
-
-        created_tasks = []
-        for idx, status in enumerate(tasks_to_create, start=1):
-            owner_choice = pick_owner(acct["Id"], me_info, kevin_info, william_info, max_william)
-            developer_id = owner_choice.get("contact_id")
-            payload = generate_task_payload(acct, project_id, status, developer_id, f"#{idx}")
-            if args.dry_run:
-                print(f"[dry-run] Would create task: {payload}")
-                fake_id = f"DRY{idx:04d}"
-                created_tasks.append({"Id": fake_id, **payload})
-                continue
-            task_id = create_record(org, "Project_Task__c", payload)
-            created_tasks.append({"Id": task_id, **payload})
-            summary["tasks"] += 1
-
-        # Subtasks (20% of tasks become parents, 1-3 subtasks each) for non-closed parents
-        open_parents = [t for t in created_tasks if t.get("Status__c") not in ("Closed", "Completed", "Removed")]
-        if open_parents:
-            potential_parents = random.sample(open_parents, max(1, len(open_parents) // 5))
-        else:
-            potential_parents = []
-        for parent in potential_parents:
-            for n in range(random.randint(1, 3)):
-                owner_choice = pick_owner(acct["Id"], me_info, kevin_info, william_info, max_william)
-                developer_id = owner_choice.get("contact_id")
-                payload = generate_task_payload(
-                    acct, project_id, random.choice(STATUSES), developer_id, f"{parent['Id']}-sub{n+1}"
-                )
-                payload["Parent_Task__c"] = parent["Id"]
-                if args.dry_run:
-                    print(f"[dry-run] Would create subtask: {payload}")
-                    sub_id = f"DRYS{len(created_tasks)+n}"
-                else:
-                    sub_id = create_record(org, "Project_Task__c", payload)
-                    summary["tasks"] += 1
-                    summary["subtasks"] += 1
-                created_tasks.append({"Id": sub_id, **payload})
-
-        # Relationships (3 random pairs per account)
-        if len(created_tasks) > 1 and rel_field_available and not args.skip_relationships:
-            for _ in range(3):
-                a, b = random.sample(created_tasks, 2)
-                rel_type = random.choice(REL_TYPES)
-                values = {
-                    "Task_A__c": a["Id"],
-                    "Task_B__c": b["Id"],
-                    "Relationship_Type__c": rel_type,
-                }
-                if args.dry_run:
-                    print(f"[dry-run] Would relate {a['Id']} -> {b['Id']} ({rel_type})")
-                else:
-                    create_record(org, "Project_Task_Relationship__c", values)
-                    summary["relationships"] += 1
+    account_kwargs = dict(
+        session=session,
+        args=args,
+        projects_by_account=projects_by_account,
+        owner_pools=owner_pools,
+        william=william_info,
+        max_william=max_william,
+        rel_field_available=rel_field_available,
+        today=today,
+    )
+    if args.parallel:
+        # Each process gets its own copy of max_william; only William's Account
+        # draws on it, and that Account lands in exactly one shard.
+        shards = [accounts[i::args.workers] for i in range(args.workers) if accounts[i::args.workers]]
+        worker = functools.partial(process_account_chunk, **account_kwargs)
+        executor = ProcessPoolExecutor(max_workers=args.workers)
+        jobs = shards
+    else:
+        # Accounts are independent, so their requests can overlap.
+        worker = functools.partial(process_account, **account_kwargs)
+        executor = ThreadPoolExecutor(max_workers=args.workers)
+        jobs = accounts
+    with executor:
+        for partial_summary in executor.map(worker, jobs):
+            for key, count in partial_summary.items():
+                summary[key] += count
 
     print("Done.")
     print(
@@ -0,0 +1,421 @@
+"""
+Shared Salesforce helpers for the data scripts in this folder.
+
+The sf CLI is only used to read the org's stored auth; everything else goes
+over one REST session, avoiding the CLI's Node startup on every call. That
+session is cached in ~/.cache/sf_pyseed/ for SESSION_CACHE_TTL so back-to-back
+script runs skip the CLI entirely. The cache is keyed by the username an alias
+resolves to in the sf CLI's alias file (~/.sfdx/alias.json), so re-pointing an
+alias starts a fresh session. If the alias cannot be resolved there, the alias
+itself is the key; delete ~/.cache/sf_pyseed/ after re-pointing it.
+
+Used by scripts/generate_project_tasks.py and scripts/split_tasks_to_projects.py.
+"""
+
+import functools
+import itertools
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Deque, Dict, FrozenSet, Iterator, List, Optional
+
+try:  # optional: orjson parses large query responses noticeably faster
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+COLLECTION_LIMIT = 200  # max records per sObject Collections request
+COMPOSITE_LIMIT = 25  # max subrequests per Composite request
+GRAPH_NODE_LIMIT = 500  # max subrequests per Composite Graph
+PIPELINE_DEPTH = 4  # concurrent requests per flush; bounded to stay clear of org limits
+
+# Sessions are cached between runs so chained scripts skip `sf org display`.
+SESSION_CACHE_DIR = Path.home() / ".cache" / "sf_pyseed"
+SESSION_CACHE_TTL = timedelta(minutes=30)
+SF_ALIAS_FILE = Path.home() / ".sfdx" / "alias.json"
+
+
+def run_sf(args: List[str], expect_json: bool = True) -> dict:
+    """Run an sf CLI command and return parsed JSON."""
+    cmd = ["sf"] + args
+    result = subprocess.run(
+        cmd, check=False, capture_output=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"sf command failed: {shlex.join(cmd)}\n"
+            f"STDERR: {result.stderr.decode('utf-8', 'replace').strip()}\n"
+            f"STDOUT: {result.stdout.decode('utf-8', 'replace').strip()}"
+        )
+    if not expect_json:
+        return {}
+    try:
+        return json_loads(result.stdout)
+    except ValueError as exc:
+        raise RuntimeError(f"Could not parse sf JSON output: {result.stdout.decode('utf-8', 'replace')}") from exc
+
+
+def escape_soql(value: str, like: bool = False) -> str:
+    """Escape a value for use inside a quoted SOQL string literal."""
+    escaped = value.replace("\\", "\\\\").replace("'", "\\'")
+    if like:
+        escaped = escaped.replace("%", "\\%").replace("_", "\\_")
+    return escaped
+
+
+def resolve_org_username(org: str) -> Optional[str]:
+    """Map an sf alias to its username via the CLI's alias file, without starting the CLI."""
+    if "@" in org:
+        return org
+    try:
+        aliases = json_loads(SF_ALIAS_FILE.read_bytes()).get("orgs", {})
+    except (OSError, ValueError, AttributeError):
+        return None
+    return aliases.get(org)
+
+
+def session_cache_path(org: str) -> Path:
+    key = resolve_org_username(org) or org
+    return SESSION_CACHE_DIR / (re.sub(r"[^\w.@-]", "_", key) + ".json")
+
+
+class SalesforceSession:
+    """REST session reusing the access token the sf CLI already holds for an org."""
+
+    def __init__(self, instance_url: str, access_token: str, api_version: str, username: Optional[str] = None) -> None:
+        self.instance_url = instance_url.rstrip("/")
+        self.access_token = access_token
+        self.api_version = api_version
+        self.username = username
+
+    @classmethod
+    def from_org(cls, org: str) -> "SalesforceSession":
+        """Reuse a recent cached session for the org, falling back to `sf org display`."""
+        cached = cls.load_cached(org)
+        if cached:
+            return cached
+        resp = run_sf(["org", "display", "--target-org", org, "--verbose", "--json"])
+        result = resp.get("result", {})
+        if not result.get("accessToken") or not result.get("instanceUrl"):
+            raise RuntimeError(f"sf org display returned no access token for {org}.")
+        session = cls(
+            result["instanceUrl"],
+            result["accessToken"],
+            result.get("apiVersion") or "60.0",
+            result.get("username"),
+        )
+        try:
+            session.save_cached(org)
+        except OSError as exc:
+            # The cache is only an optimization; a read-only HOME should not fail the run.
+            print(f"Warning: could not cache the session for {org}: {exc}", file=sys.stderr)
+        return session
+
+    @classmethod
+    def load_cached(cls, org: str) -> Optional["SalesforceSession"]:
+        """Return the cached session if it is within SESSION_CACHE_TTL and still accepted by the org."""
+        path = session_cache_path(org)
+        try:
+            data = json_loads(path.read_bytes())
+            fetched_at = datetime.fromisoformat(data["fetchedAt"])
+            if datetime.now(timezone.utc) - fetched_at > SESSION_CACHE_TTL:
+                return None
+            username = resolve_org_username(org)
+            if username and data.get("username") != username:
+                return None
+            session = cls(data["instanceUrl"], data["accessToken"], data["apiVersion"], data.get("username"))
+            session.request("GET", "query?" + urllib.parse.urlencode({"q": "SELECT Id FROM User LIMIT 1"}))
+        except (OSError, ValueError, KeyError, TypeError, RuntimeError):
+            return None
+        return session
+
+    def save_cached(self, org: str) -> None:
+        """Persist the token (owner-only permissions) for reuse by later runs."""
+        path = session_cache_path(org)
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        path.parent.chmod(0o700)  # mkdir leaves an existing directory's mode alone
+        data = {
+            "accessToken": self.access_token,
+            "instanceUrl": self.instance_url,
+            "apiVersion": self.api_version,
+            "username": self.username,
+            "fetchedAt": datetime.now(timezone.utc).isoformat(),
+        }
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def request(self, method: str, path: str, body: Optional[object] = None) -> object:
+        """Call a REST endpoint; relative paths are resolved against /services/data/vXX.0/."""
+        if not path.startswith("/services/"):
+            path = f"/services/data/v{self.api_version}/{path.lstrip('/')}"
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        req = urllib.request.Request(
+            self.instance_url + path,
+            data=data,
+            method=method,
+            headers={
+                "Authorization": f"Bearer {self.access_token}",
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+            },
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=120) as resp:
+                raw = resp.read()
+        except urllib.error.HTTPError as exc:
+            raise RuntimeError(
+                f"{method} {path} failed ({exc.code}): {exc.read().decode('utf-8', 'replace')}"
+            ) from exc
+        return json_loads(raw) if raw else {}
+
+
+def soql_iter(session: SalesforceSession, query: str) -> Iterator[dict]:
+    """Yield query records page by page, following nextRecordsUrl."""
+    resp = session.request("GET", "query?" + urllib.parse.urlencode({"q": query}))
+    yield from resp.get("records", [])
+    while not resp.get("done", True):
+        resp = session.request("GET", resp["nextRecordsUrl"])
+        yield from resp.get("records", [])
+
+
+def composite_query(session: SalesforceSession, queries: Dict[str, str]) -> Dict[str, dict]:
+    """
+    Run several queries in one Composite API request, keyed by reference name.
+
+    Each result is the query response with every page collected into "records",
+    including the pages of nested child-relationship sets.
+    """
+    if len(queries) > COMPOSITE_LIMIT:
+        raise ValueError(f"At most {COMPOSITE_LIMIT} queries fit in one composite request.")
+    resp = session.request(
+        "POST",
+        "composite",
+        {
+            "compositeRequest": [
+                {
+                    "method": "GET",
+                    "url": f"/services/data/v{session.api_version}/query?" + urllib.parse.urlencode({"q": query}),
+                    "referenceId": ref,
+                }
+                for ref, query in queries.items()
+            ]
+        },
+    )
+    results = {}
+    for sub in resp.get("compositeResponse", []):
+        ref, body = sub.get("referenceId"), sub.get("body")
+        if sub.get("httpStatusCode") != 200:
+            raise RuntimeError(f"Composite query '{ref}' failed: {body}")
+        page = body
+        while not page.get("done", True):
+            page = session.request("GET", page["nextRecordsUrl"])
+            body["records"].extend(page.get("records", []))
+        for record in body["records"]:
+            for children in record.values():
+                # Subquery sets page independently of their parent query
+                if isinstance(children, dict) and "records" in children:
+                    child_page = children
+                    while not child_page.get("done", True):
+                        child_page = session.request("GET", child_page["nextRecordsUrl"])
+                        children["records"].extend(child_page.get("records", []))
+        results[ref] = body
+    return results
+
+
+@functools.lru_cache(maxsize=None)
+def describe_fields(session: SalesforceSession, sobject: str) -> FrozenSet[str]:
+    """Return the API names of an sObject's fields (described once per run)."""
+    resp = session.request("GET", f"sobjects/{sobject}/describe")
+    return frozenset(field["name"] for field in resp.get("fields", []))
+
+
+class PendingId:
+    """Placeholder for a record Id that is only known once its batch is flushed."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Optional[str] = None) -> None:
+        self.value = value
+
+    def __str__(self) -> str:
+        return self.value or "<pending>"
+
+    def __repr__(self) -> str:
+        return repr(self.value) if self.value else "<pending>"
+
+
+class BatchWriter:
+    """
+    Buffer inserts per sObject and create them through the sObject Collections
+    endpoint, up to COLLECTION_LIMIT records per request.
+
+    Values may reference other records by PendingId; those are resolved at flush
+    time, so the referenced batch must be flushed first.
+    """
+
+    def __init__(self, session: SalesforceSession) -> None:
+        self.session = session
+        self.buffers: Dict[str, List[tuple]] = {}
+
+    def add(self, sobject: str, values: Dict[str, object]) -> PendingId:
+        pending = PendingId()
+        self.buffers.setdefault(sobject, []).append((values, pending))
+        return pending
+
+    def flush(self, sobject: Optional[str] = None) -> int:
+        """Insert buffered records (one sObject or all) and return how many were created."""
+        sobjects = [sobject] if sobject else list(self.buffers)
+        created = 0
+        for name in sobjects:
+            rows = self.buffers.pop(name, [])
+            chunks = [rows[start:start + COLLECTION_LIMIT] for start in range(0, len(rows), COLLECTION_LIMIT)]
+            bodies = [
+                {
+                    "allOrNone": True,
+                    "records": [
+                        {"attributes": {"type": name}, **resolve_values(values)}
+                        for values, _ in chunk
+                    ],
+                }
+                for chunk in chunks
+            ]
+            created += self.insert_pipelined(name, chunks, bodies)
+        return created
+
+    def insert_pipelined(self, name: str, chunks: List[list], bodies: List[dict]) -> int:
+        """
+        POST each chunk to sObject Collections, keeping up to PIPELINE_DEPTH
+        requests in flight so one chunk's round-trip overlaps the next.
+
+        Once a chunk fails no further chunks are sent, but the ones already in
+        flight may still commit. Every chunk that did commit, before or after
+        the failure, has its PendingIds filled in and is counted in the error
+        (with a sample of its Ids) so a re-run does not blindly duplicate it.
+        """
+        queued = iter(zip(chunks, bodies))
+        in_flight: Deque[tuple] = deque()
+
+        def submit_next(executor: ThreadPoolExecutor) -> None:
+            for chunk, body in itertools.islice(queued, 1):
+                in_flight.append((chunk, executor.submit(self.session.request, "POST", "composite/sobjects", body)))
+
+        created = 0
+        failure: Optional[str] = None
+        committed: List[str] = []
+        with ThreadPoolExecutor(max_workers=PIPELINE_DEPTH) as executor:
+            for _ in range(PIPELINE_DEPTH):
+                submit_next(executor)
+            while in_flight:
+                chunk, future = in_flight.popleft()
+                try:
+                    results = future.result()
+                    failed = next((result for result in results if not result.get("success")), None)
+                    if failed is not None:
+                        raise RuntimeError(failed.get("errors"))
+                except (RuntimeError, OSError) as exc:
+                    failure = failure or str(exc)
+                    continue
+                for (_, pending), result in zip(chunk, results):
+                    pending.value = result["id"]
+                created += len(chunk)
+                committed.extend(result["id"] for result in results)
+                if not failure:
+                    submit_next(executor)
+        if failure:
+            message = f"Insert into {name} failed: {failure}"
+            if committed:
+                sample = ", ".join(committed[:5])
+                more = ", ..." if len(committed) > 5 else ""
+                message += f" ({len(committed)} {name} records were already created: {sample}{more})"
+            raise RuntimeError(message)
+        return created
+
+
+class CompositeGraph:
+    """
+    Collect inserts into Composite Graphs so records that reference each
+    other are created in a single request (and a single transaction).
+
+    add() returns an "@{refN.id}" reference that later values can use in place
+    of the Id; Salesforce resolves it server-side. References only resolve
+    within one graph, so callers mark related records with start_group() and
+    groups that no longer fit spill over into another graph.
+    """
+
+    def __init__(self, session: SalesforceSession) -> None:
+        self.session = session
+        self.graphs: List[List[dict]] = [[]]
+        self.refs = 0
+
+    def start_group(self, size: int) -> None:
+        """Keep the next `size` records in one graph so they can reference each other."""
+        if size > GRAPH_NODE_LIMIT:
+            raise RuntimeError(f"Composite graph is limited to {GRAPH_NODE_LIMIT} records.")
+        if len(self.graphs[-1]) + size > GRAPH_NODE_LIMIT:
+            self.graphs.append([])
+
+    def fits(self, count: int) -> bool:
+        """Whether `count` more records can share one graph with everything queued so far."""
+        return len(self.graphs) == 1 and len(self.graphs[0]) + count <= GRAPH_NODE_LIMIT
+
+    def add(self, sobject: str, values: Dict[str, object]) -> str:
+        if len(self.graphs[-1]) >= GRAPH_NODE_LIMIT:
+            raise RuntimeError(f"Composite graph is limited to {GRAPH_NODE_LIMIT} records; call start_group() first.")
+        self.refs += 1
+        ref = f"ref{self.refs}"
+        self.graphs[-1].append(
+            {
+                "method": "POST",
+                "url": f"/services/data/v{self.session.api_version}/sobjects/{sobject}",
+                "referenceId": ref,
+                "body": values,
+            }
+        )
+        return f"@{{{ref}.id}}"
+
+    def submit(self) -> Dict[str, str]:
+        """
+        Create every queued record, one request per graph, and return Ids keyed
+        by the reference add() returned. Each graph commits on its own, so a
+        failure leaves earlier graphs in place.
+        """
+        ids: Dict[str, str] = {}
+        for nodes in self.graphs:
+            if not nodes:
+                continue
+            resp = self.session.request(
+                "POST",
+                "composite/graph",
+                {"graphs": [{"graphId": "1", "compositeRequest": nodes}]},
+            )
+            graph = resp.get("graphs", [{}])[0]
+            responses = graph.get("graphResponse", {}).get("compositeResponse", [])
+            if not graph.get("isSuccessful"):
+                errors = [r.get("body") for r in responses if r.get("httpStatusCode", 500) >= 400]
+                raise RuntimeError(f"Composite graph insert failed: {errors}")
+            ids.update({f"@{{{r['referenceId']}.id}}": r["body"]["id"] for r in responses})
+        self.graphs = [[]]
+        return ids
+
+
+def resolve_values(values: Dict[str, object]) -> Dict[str, object]:
+    """Swap PendingId placeholders for the real Ids assigned at flush."""
+    resolved = {}
+    for key, value in values.items():
+        if isinstance(value, PendingId):
+            if value.value is None:
+                raise RuntimeError(f"{key} references a record that has not been flushed yet.")
+            value = value.value
+        resolved[key] = value
+    return resolved
@@ -10,81 +10,110 @@ Usage:
 """
 
 import argparse
+import csv
 import datetime as dt
 import json
+import os
 import random
-import subprocess
 import sys
-from typing import Dict, List
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from sf_api import BatchWriter, PendingId, SalesforceSession, composite_query, escape_soql, run_sf, soql_iter
 
 PROJECT_STATUSES = ["Not Started", "R&D", "Proposal", "Development", "Q&A", "Deployed", "Cancelled"]
 
 
-def run_sf(args: List[str], expect_json: bool = True) -> dict:
-    """Run an sf CLI command and return parsed JSON."""
-    cmd = ["sf"] + args
-    result = subprocess.run(
-        cmd, check=False, capture_output=True, text=True
-    )
-    if result.returncode != 0:
-        raise RuntimeError(
-            f"sf command failed: {' '.join(cmd)}\nSTDERR: {result.stderr.strip()}\nSTDOUT: {result.stdout.strip()}"
-        )
-    if not expect_json:
-        return {}
+def bulk_update(org: str, sobject: str, rows: Iterable[Dict[str, str]], fields: List[str]) -> int:
+    """Write rows to a CSV and apply them with one Bulk API update job; return rows sent."""
+    fd, csv_path = tempfile.mkstemp(suffix=".csv")
     try:
-        return json.loads(result.stdout)
-    except json.JSONDecodeError as exc:
-        raise RuntimeError(f"Could not parse sf JSON output: {result.stdout}") from exc
-
-
-def soql(org: str, query: str) -> List[dict]:
-    resp = run_sf(
-        ["data", "query", "--target-org", org, "-q", query, "--json"]
-    )
-    return resp.get("result", {}).get("records", [])
-
-
-def create_record(org: str, sobject: str, values: Dict[str, str]) -> str:
-    value_str = " ".join([f"{k}='{v}'" for k, v in values.items()])
-    resp = run_sf(
-        [
-            "data",
-            "create",
-            "record",
-            "--target-org",
-            org,
-            "--sobject",
-            sobject,
-            "--values",
-            value_str,
-            "--json",
-        ]
-    )
-    return resp.get("result", {}).get("id")
-
-
-def update_record(org: str, sobject: str, record_id: str, values: Dict[str, str]) -> None:
-    """Update a record using sf CLI."""
-    value_str = " ".join([f"{k}='{v}'" for k, v in values.items()])
-    resp = run_sf(
-        [
-            "data",
-            "update",
-            "record",
-            "--target-org",
-            org,
-            "--sobject",
-            sobject,
-            "--record-id",
-            record_id,
-            "--values",
-            value_str,
-            "--json",
-        ]
-    )
-    if resp.get("status") != 0:
-        raise RuntimeError(f"Update failed: {resp}")
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, lineterminator="\n")
+            writer.writeheader()
+            count = 0
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        if count == 0:
+            return 0
+        resp = run_sf(
+            [
+                "data",
+                "update",
+                "bulk",
+                "--target-org",
+                org,
+                "--sobject",
+                sobject,
+                "--file",
+                csv_path,
+                "--wait",
+                "10",
+                "--json",
+            ]
+        )
+    finally:
+        os.unlink(csv_path)
+    result = resp.get("result", {})
+    failed = result.get("failedRecords") or result.get("jobInfo", {}).get("numberRecordsFailed") or 0
+    if resp.get("status") != 0 or int(failed) > 0:
+        raise RuntimeError(f"Bulk update failed: {resp}")
+    return count
+
+
+def ensure_projects(
+    session: SalesforceSession,
+    account_id: str,
+    account_name: str,
+    first_number: int,
+    needed: int,
+    today_str: str,
+    dry_run: bool,
+) -> List[str]:
+    """Create `needed` projects for the account in one batch; return their Ids in order."""
+    writer = BatchWriter(session)
+    new_projects = []
+    for number in range(first_number, first_number + needed):
+        project_name = f"{account_name} Project {today_str} - {number}"
+        project_values = {
+            "Name": project_name,
+            "Account__c": account_id,
+            "Status__c": random.choice(PROJECT_STATUSES),
+        }
+        if dry_run:
+            print(f"[dry-run] Would create project: {project_values}")
+            new_projects.append((project_name, PendingId(f"DRYPROJ{number}")))
+        else:
+            new_projects.append((project_name, writer.add("Project__c", project_values)))
+    if not dry_run:
+        writer.flush("Project__c")
+        for project_name, project_id in new_projects:
+            print(f"Created project '{project_name}' ({project_id})")
+    return [project_id.value for _, project_id in new_projects]
+
+
+def assign_projects(tasks: Iterable[dict], quotas: List[int]) -> Iterator[Tuple[dict, int]]:
+    """
+    Yield (task, project index) pairs so each project gets exactly its quota.
+
+    Each task is drawn against the quotas still open, which gives the same
+    result as shuffling the full list without having to hold it in memory.
+    Tasks past the quota total (created after counting) are left in place.
+    """
+    remaining = list(quotas)
+    left = sum(remaining)
+    for task in tasks:
+        if left == 0:
+            return
+        pick = random.randrange(left)
+        for i, open_slots in enumerate(remaining):
+            if pick < open_slots:
+                break
+            pick -= open_slots
+        remaining[i] -= 1
+        left -= 1
+        yield task, i
 
 
 def main() -> None:
@@ -96,100 +125,87 @@ def main() -> None:
     args = parser.parse_args()
 
     org = args.org
-
-    # Get the original project info
-    projects = soql(org, f"SELECT Id, Name, Account__c FROM Project__c WHERE Id = '{args.project_id}'")
-    if not projects:
+    session = SalesforceSession.from_org(org)
+
+    # Fetch the project, its account's projects and the task count in one round-trip
+    project_literal = escape_soql(args.project_id)
+    startup = composite_query(
+        session,
+        {
+            "original": (
+                "SELECT Id, Name, Account__c, Account__r.Name FROM Project__c "
+                f"WHERE Id = '{project_literal}'"
+            ),
+            # SOQL semi-joins cannot select from the outer object, so root the siblings on Account
+            "account": (
+                "SELECT Id, (SELECT Id, Name FROM Projects__r) FROM Account "
+                f"WHERE Id IN (SELECT Account__c FROM Project__c WHERE Id = '{project_literal}')"
+            ),
+            "tasks": f"SELECT COUNT() FROM Project_Task__c WHERE Project__c = '{project_literal}'",
+        },
+    )
+    original_project = next(iter(startup["original"]["records"]), None)
+    if not original_project:
         sys.exit(f"Project {args.project_id} not found.")
-    
-    original_project = projects[0]
+
     account_id = original_project["Account__c"]
-    account_name = soql(org, f"SELECT Name FROM Account WHERE Id = '{account_id}'")[0]["Name"]
+    account_name = original_project["Account__r"]["Name"]
+    account = next(iter(startup["account"]["records"]), {})
+    existing_projects = (account.get("Projects__r") or {}).get("records", [])
     
     print(f"Original project: {original_project['Name']} (Account: {account_name})")
 
-    # Get all tasks for this project
-    tasks = soql(org, f"SELECT Id, Name, Project__c FROM Project_Task__c WHERE Project__c = '{args.project_id}'")
-    print(f"Found {len(tasks)} tasks to redistribute")
+    # The tasks themselves are streamed when moved
+    task_count = startup["tasks"]["totalSize"]
+    print(f"Found {task_count} tasks to redistribute")
 
-    if len(tasks) == 0:
+    if task_count == 0:
         print("No tasks to redistribute.")
         return
 
-    # Create additional projects if needed
-    existing_projects = soql(org, f"SELECT Id, Name FROM Project__c WHERE Account__c = '{account_id}'")
-    existing_project_ids = {p["Id"] for p in existing_projects}
-    
-    projects_to_use = [args.project_id]  # Start with original project
-    
-    # Create new projects if we need more
-    projects_needed = args.num_projects - len(existing_projects)
+    today_str = dt.date.today().strftime("%Y%m%d")
+
+    # Use the account's other projects first, then create whatever is still missing
+    projects_to_use = [args.project_id] + [
+        proj["Id"] for proj in existing_projects if proj["Id"] != original_project["Id"]
+    ]
+    projects_needed = args.num_projects - len(projects_to_use)
     if projects_needed > 0:
         print(f"Creating {projects_needed} additional projects...")
-        for i in range(projects_needed):
-            project_name = f"{account_name} Project {dt.date.today().strftime('%Y%m%d')} - {i+2}"
-            project_values = {
-                "Name": project_name,
-                "Account__c": account_id,
-                "Status__c": random.choice(PROJECT_STATUSES),
-            }
-            if args.dry_run:
-                print(f"[dry-run] Would create project: {project_values}")
-                fake_id = f"DRYPROJ{i+2}"
-                projects_to_use.append(fake_id)
-            else:
-                project_id = create_record(org, "Project__c", project_values)
-                projects_to_use.append(project_id)
-                print(f"Created project '{project_name}' ({project_id})")
-    else:
-        # Use existing projects
-        for proj in existing_projects:
-            if proj["Id"] != args.project_id:
-                projects_to_use.append(proj["Id"])
-        # If we still need more, create them
-        while len(projects_to_use) < args.num_projects:
-            i = len(projects_to_use)
-            project_name = f"{account_name} Project {dt.date.today().strftime('%Y%m%d')} - {i+1}"
-            project_values = {
-                "Name": project_name,
-                "Account__c": account_id,
-                "Status__c": random.choice(PROJECT_STATUSES),
-            }
-            if args.dry_run:
-                print(f"[dry-run] Would create project: {project_values}")
-                fake_id = f"DRYPROJ{i+1}"
-                projects_to_use.append(fake_id)
-            else:
-                project_id = create_record(org, "Project__c", project_values)
-                projects_to_use.append(project_id)
-                print(f"Created project '{project_name}' ({project_id})")
-
-    print(f"\nDistributing {len(tasks)} tasks across {len(projects_to_use)} projects...")
-
-    # Randomly distribute tasks across projects
-    random.shuffle(tasks)
-    tasks_per_project = len(tasks) // len(projects_to_use)
-    remainder = len(tasks) % len(projects_to_use)
-
-    distribution = {}
-    task_idx = 0
-    for i, project_id in enumerate(projects_to_use):
+        projects_to_use += ensure_projects(
+            session,
+            account_id,
+            account_name,
+            len(projects_to_use) + 1,
+            projects_needed,
+            today_str,
+            args.dry_run,
+        )
+
+    print(f"\nDistributing {task_count} tasks across {len(projects_to_use)} projects...")
+
+    tasks_per_project = task_count // len(projects_to_use)
+    remainder = task_count % len(projects_to_use)
+    quotas = []
+    for i in range(len(projects_to_use)):
         count = tasks_per_project + (1 if i < remainder else 0)
-        distribution[project_id] = tasks[task_idx:task_idx + count]
-        task_idx += count
+        quotas.append(count)
         print(f"  Project {i+1}: {count} tasks")
 
-    # Update tasks to new projects
+    # Stream tasks, randomly assigning each one; only moves off the original project are written
+    tasks = soql_iter(session, f"SELECT Id, Name FROM Project_Task__c WHERE Project__c = '{project_literal}'")
+    moves = (
+        (task, projects_to_use[i])
+        for task, i in assign_projects(tasks, quotas)
+        if i != 0  # Skip original project
+    )
     updates_made = 0
-    for project_id, project_tasks in distribution.items():
-        if project_id == args.project_id:
-            continue  # Skip original project
-        for task in project_tasks:
-            if args.dry_run:
-                print(f"[dry-run] Would move task {task['Id']} ({task['Name']}) to project {project_id}")
-            else:
-                update_record(org, "Project_Task__c", task["Id"], {"Project__c": project_id})
-                updates_made += 1
+    if args.dry_run:
+        for task, project_id in moves:
+            print(f"[dry-run] Would move task {task['Id']} ({task['Name']}) to project {project_id}")
+    else:
+        rows = ({"Id": task["Id"], "Project__c": project_id} for task, project_id in moves)
+        updates_made = bulk_update(org, "Project_Task__c", rows, ["Id", "Project__c"])
 
     if not args.dry_run:
         print(f"\nDone. Moved {updates_made} tasks across {len(projects_to_use)} projects.")
@@ -197,7 +213,7 @@ def main() -> None:
             "original_project": args.project_id,
             "total_projects": len(projects_to_use),
             "tasks_moved": updates_made,
-            "tasks_remaining_in_original": len(distribution.get(args.project_id, []))
+            "tasks_remaining_in_original": quotas[0]
         }, indent=2))
     else:
         print("\n[dry-run] No changes made.")